@@ -6,6 +6,8 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.routers.v1 import media_links
 from src.infra.resources.manager import resource_manager
+from src.configs.adapters import cdn_invalidation_queue
+from src.infra.cdn_invalidation import changed_paths
 from src.configs import exceptions
 
 
@@ -67,3 +69,19 @@ async def info(term: str):
 
 # Mangum Handler, this is so important
 handler = Mangum(app)
+
+
+# S3 notifications (ObjectCreated/ObjectRemoved) batched by SQS,
+# the content under the keys is uploaded/overwritten/removed
+def media_events_handler(event, context):
+    asyncio.run(invalidate_changed_objects(event))
+
+
+async def invalidate_changed_objects(event):
+    for path in changed_paths(event):
+        cdn_invalidation_queue.put(path)
+
+    unsent = await cdn_invalidation_queue.flush()
+    if unsent:
+        # fail the batch, so that SQS redelivers it
+        raise RuntimeError(f'CDN invalidation failed, unsent paths: {len(unsent)}')
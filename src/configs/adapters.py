@@ -1,9 +1,14 @@
 from pydantic import BaseModel
 from ..infra.resources.handlers.storage_resource import *
+from ..infra.resources.handlers.signer_resource import S3PostPolicySignerHandler
 from ..infra.resources.manager import resource_manager
+from ..infra.cdn_client import get_cdn_client
+from ..infra.cdn_invalidation import InvalidationQueue
 
 storage_resource: S3ResourceHandler = resource_manager.get('storage_resource')
 storage_client: S3ResourceClientHandler = resource_manager.get('storage_client')
+storage_hedged_client: S3ResourceClientHandler = resource_manager.get('storage_hedged_client')
+storage_signer: S3PostPolicySignerHandler = resource_manager.get('storage_signer')
 
 
 
@@ -11,6 +16,9 @@ storage_client: S3ResourceClientHandler = resource_manager.get('storage_client')
 class StorageAdapter(BaseModel):
     resource: S3ResourceHandler
     client: S3ResourceClientHandler
+    # no client-side retries, for the calls through HedgedCaller
+    hedged_client: S3ResourceClientHandler
+    signer: S3PostPolicySignerHandler
 
     # Pydantic 默認不允許自定義類型
     # 當 arbitrary_types_allowed 設置為 True 時，允許任意類型的字段
@@ -20,4 +28,9 @@ class StorageAdapter(BaseModel):
 storage_adapter = StorageAdapter(
     resource=storage_resource,
     client=storage_client,
+    hedged_client=storage_hedged_client,
+    signer=storage_signer,
 )
+
+
+cdn_invalidation_queue = InvalidationQueue(get_cdn_client())
@@ -1,24 +1,51 @@
 import os
 
+STAGE = os.getenv('STAGE', None)
+
 # probe cycle secs
 PROBE_CYCLE_SECS = int(os.getenv("PROBE_CYCLE_SECS", 3))
 
 # for media_links of routers
 FT_MEDIA_BUCKET = os.getenv('FT_MEDIA_BUCKET', 'foreign-teacher-media')
+S3_REGION = os.getenv('AWS_REGION', 'ap-northeast-1')
 S3_CONNECT_TIMEOUT=int(os.getenv("S3_CONNECT_TIMEOUT", 10))
 S3_READ_TIMEOUT=int(os.getenv("S3_READ_TIMEOUT", 10))
 S3_MAX_ATTEMPTS=int(os.getenv("S3_MAX_ATTEMPTS", 3))
+# hedged & deadline-aware calls (tail latency)
+S3_REQUEST_DEADLINE_SECS = float(os.getenv("S3_REQUEST_DEADLINE_SECS", 8.0))
+S3_HEDGE_PERCENTILE = float(os.getenv("S3_HEDGE_PERCENTILE", 95.0))
+S3_HEDGE_MIN_DELAY_SECS = float(os.getenv("S3_HEDGE_MIN_DELAY_SECS", 0.05))
+S3_HEDGE_MAX_DELAY_SECS = float(os.getenv("S3_HEDGE_MAX_DELAY_SECS", 1.0))
+S3_HEDGE_WINDOW_SIZE = int(os.getenv("S3_HEDGE_WINDOW_SIZE", 200))
 
 # for upload/delete (write)
 STORAGE_HOST = os.getenv('STORAGE_HOST', f'https://{FT_MEDIA_BUCKET}.s3.amazonaws.com')
 # for accelerate (read)
 CDN_HOST = os.getenv('CDN_HOST', 'http://localhost:8000')
+# for cache invalidation of CDN: 'cloudfront' | 'local'
+CDN_CLIENT = os.getenv('CDN_CLIENT', 'local')
+CDN_DISTRIBUTION_ID = os.getenv('CDN_DISTRIBUTION_ID', None)
+CDN_INVALIDATION_BATCH_SIZE = int(os.getenv('CDN_INVALIDATION_BATCH_SIZE', 100))
+CDN_INVALIDATION_MAX_ATTEMPTS = int(os.getenv('CDN_INVALIDATION_MAX_ATTEMPTS', 3))
 ACCESS_KEY = os.getenv('ACCESS_KEY', None)
 SECRET_ACCESS_KEY = os.getenv('SECRET_ACCESS_KEY', None)
 MIN_FILE_BIT_SIZE = int(os.getenv('MIN_FILE_BIT_SIZE', 1024))
 MAX_FILE_BIT_SIZE = int(os.getenv('MAX_FILE_BIT_SIZE', 2097152)) # 2 MB
 URL_EXPIRE_SECS = int(os.getenv('URL_EXPIRE_SECS', 300)) # 5 mins
 MAX_TOTAL_MB = float(os.getenv('MAX_TOTAL_MB', 8.0))
+# precomputed usage: served as-is within the TTL,
+# or within the max age if the client passes back the same version token.
+# the cache is per instance (Lambda), uploads signed by other instances are
+# not seen, so the max age bounds how stale a served quota can be
+USAGE_CACHE_TTL_SECS = float(os.getenv('USAGE_CACHE_TTL_SECS', 30))
+USAGE_VERSION_MAX_AGE_SECS = float(os.getenv('USAGE_VERSION_MAX_AGE_SECS', 60))
+# signed keys verified by HEAD before the snapshot is recomputed
+USAGE_MAX_PENDING_KEYS = int(os.getenv('USAGE_MAX_PENDING_KEYS', 3))
+# prefetch waits for the computation this long, it may not progress after
+# the response is returned (Lambda)
+USAGE_PREFETCH_WAIT_SECS = float(os.getenv('USAGE_PREFETCH_WAIT_SECS', 1.0))
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', 50))
+MAX_LIST_PAGE_SIZE = int(os.getenv('MAX_LIST_PAGE_SIZE', 1000))
 
 # for media_users of routers
 S3_HOST = os.getenv('S3_HOST', 'http://localhost:8000')
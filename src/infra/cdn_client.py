@@ -0,0 +1,68 @@
+import uuid
+import aioboto3
+from abc import ABC, abstractmethod
+from typing import List
+from ..configs.conf import (
+    STAGE,
+    CDN_CLIENT,
+    CDN_DISTRIBUTION_ID,
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class CDNClient(ABC):
+
+    @abstractmethod
+    async def invalidate(self, paths: List[str]):
+        pass
+
+
+class CloudFrontClient(CDNClient):
+
+    def __init__(self, session: aioboto3.Session, distribution_id: str):
+        self.session = session
+        self.distribution_id = distribution_id
+
+    async def invalidate(self, paths: List[str]):
+        async with self.session.client('cloudfront') as client:
+            response = await client.create_invalidation(
+                DistributionId=self.distribution_id,
+                InvalidationBatch={
+                    'Paths': {
+                        'Quantity': len(paths),
+                        'Items': paths,
+                    },
+                    'CallerReference': uuid.uuid4().hex,
+                }
+            )
+            log.info('CDN[CloudFront] invalidation: %s, paths: %s',
+                     response['Invalidation']['Id'], len(paths))
+
+
+# local stand-in, records the batches instead of calling the CDN
+class LocalCDNClient(CDNClient):
+
+    def __init__(self):
+        self.invalidations: List[List[str]] = []
+
+    async def invalidate(self, paths: List[str]):
+        self.invalidations.append(list(paths))
+        log.info('CDN[local] invalidation, paths: %s', paths)
+
+
+def get_cdn_client() -> CDNClient:
+    if CDN_CLIENT == 'cloudfront':
+        if CDN_DISTRIBUTION_ID is None:
+            raise ValueError('CDN_DISTRIBUTION_ID is required for CDN_CLIENT "cloudfront"')
+        return CloudFrontClient(aioboto3.Session(), CDN_DISTRIBUTION_ID)
+
+    if CDN_CLIENT == 'local':
+        # the local client invalidates nothing, it's not for deployed stages
+        if STAGE is not None:
+            raise ValueError(f'CDN_CLIENT "local" is not allowed on stage "{STAGE}"')
+        return LocalCDNClient()
+
+    raise ValueError(f'CDN_CLIENT "{CDN_CLIENT}" not supported.')
@@ -0,0 +1,83 @@
+import json
+import asyncio
+from typing import Dict, List, Set
+from urllib.parse import unquote_plus
+from .cdn_client import CDNClient
+from ..configs.conf import (
+    CDN_INVALIDATION_BATCH_SIZE,
+    CDN_INVALIDATION_MAX_ATTEMPTS,
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class InvalidationQueue:
+    '''
+    collects changed paths and coalesces them into batched invalidation calls
+    of batch_size paths at most; the time window is the one of the event
+    source (SQS maximumBatchingWindow)
+    '''
+
+    def __init__(
+        self,
+        cdn_client: CDNClient,
+        batch_size: int = CDN_INVALIDATION_BATCH_SIZE,
+        max_attempts: int = CDN_INVALIDATION_MAX_ATTEMPTS,
+    ):
+        self.cdn_client = cdn_client
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+        # the same path queued twice is invalidated once
+        self.paths: Set[str] = set()
+
+    def put(self, path: str):
+        self.paths.add(path)
+
+    async def flush(self) -> (List[str]):
+        '''
+        returns the paths which are still unsent after all attempts,
+        they are not queued again: the caller fails & the event is redelivered
+        '''
+        paths = sorted(self.paths)
+        self.paths.clear()
+
+        unsent = []
+        for i in range(0, len(paths), self.batch_size):
+            batch = paths[i:i + self.batch_size]
+            if not await self.__invalidate(batch):
+                unsent.extend(batch)
+
+        return unsent
+
+    async def __invalidate(self, batch: List[str]) -> bool:
+        for attempt in range(self.max_attempts):
+            try:
+                await self.cdn_client.invalidate(batch)
+                return True
+
+            except Exception as e:
+                log.error('CDN invalidation attempt %s failed: %s', attempt + 1, e)
+                if attempt + 1 < self.max_attempts:
+                    await asyncio.sleep(0.5 * (2 ** attempt))
+
+        return False
+
+
+def changed_paths(sqs_event: Dict) -> (List[str]):
+    '''
+    CDN paths of the objects in the S3 notifications (ObjectCreated/ObjectRemoved)
+    delivered by SQS
+    '''
+    paths = []
+    for message in sqs_event.get('Records', []):
+        notification = json.loads(message['body'])
+        # the s3:TestEvent (sent on configuring the notification) has no records
+        for record in notification.get('Records', []):
+            # keys in S3 notifications are url-encoded
+            object_key = unquote_plus(record['s3']['object']['key'])
+            paths.append(f'/{object_key}')
+
+    return paths
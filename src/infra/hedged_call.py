@@ -0,0 +1,169 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable
+from botocore.exceptions import ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+from ..configs.conf import (
+    S3_REQUEST_DEADLINE_SECS,
+    S3_HEDGE_PERCENTILE,
+    S3_HEDGE_MIN_DELAY_SECS,
+    S3_HEDGE_MAX_DELAY_SECS,
+    S3_HEDGE_WINDOW_SIZE,
+    S3_MAX_ATTEMPTS,
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+# samples required before the observed percentile is trusted
+MIN_HEDGE_SAMPLES = 20
+
+TRANSIENT_ERROR_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'SlowDown',
+    'RequestTimeout',
+    'RequestTimeoutException',
+    'InternalError',
+    'ServiceUnavailable',
+}
+
+
+def is_transient(e: Exception) -> bool:
+    '''
+    throttling, 5xx, connection errors and timeouts can succeed on retry,
+    the others (AccessDenied, NoSuchBucket, InvalidArgument, ...) can't
+    '''
+    if isinstance(e, ClientError):
+        error = e.response.get('Error', {})
+        status_code = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        return error.get('Code') in TRANSIENT_ERROR_CODES or status_code >= 500
+
+    return isinstance(e, (
+        HTTPClientError, BotoConnectionError, ConnectionError, asyncio.TimeoutError))
+
+
+class Deadline:
+    '''
+    absolute time budget of one request, shared by all of its storage calls
+    '''
+
+    def __init__(self, timeout_secs: float = S3_REQUEST_DEADLINE_SECS):
+        self.expires_at = time.monotonic() + timeout_secs
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+
+class HedgedCaller:
+    '''
+    call wrapper for tail latency:
+    - a duplicate (hedged) request is sent when the first one is slower than
+      the observed latency percentile, the first response wins
+    - retries only happen for transient errors, within the remaining budget of the deadline
+    - the client should not retry by itself (see s3_hedged_config)
+    '''
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float = S3_HEDGE_PERCENTILE,
+        min_delay: float = S3_HEDGE_MIN_DELAY_SECS,
+        max_delay: float = S3_HEDGE_MAX_DELAY_SECS,
+        window_size: int = S3_HEDGE_WINDOW_SIZE,
+        max_attempts: int = S3_MAX_ATTEMPTS,
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.latencies = deque(maxlen=window_size)
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < MIN_HEDGE_SAMPLES:
+            return self.max_delay
+
+        samples = sorted(self.latencies)
+        idx = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return min(self.max_delay, max(self.min_delay, samples[idx]))
+
+    async def call(
+        self,
+        request: Callable[[], Awaitable[Any]],
+        deadline: Deadline,
+    ):
+        '''
+        request: factory of the awaitable, it's invoked once per (hedged) attempt
+        '''
+        last_error: Exception = None
+        for attempt in range(self.max_attempts):
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                break
+
+            try:
+                return await asyncio.wait_for(self.__hedged(request), timeout=remaining)
+
+            except asyncio.TimeoutError as e:
+                last_error = e
+                break
+
+            except Exception as e:
+                last_error = e
+                log.warning('%s attempt %s failed: %s', self.name, attempt + 1, e)
+                if not is_transient(e) or attempt + 1 == self.max_attempts:
+                    break
+                backoff = min(0.1 * (2 ** attempt), deadline.remaining())
+                await asyncio.sleep(backoff)
+
+        if last_error is None or isinstance(last_error, asyncio.TimeoutError):
+            raise asyncio.TimeoutError(f'{self.name} exceeded the deadline')
+
+        raise last_error
+
+    async def __hedged(self, request: Callable[[], Awaitable[Any]]):
+        loop = asyncio.get_running_loop()
+        # task -> start time, the latency of the winner is its own
+        starts = {}
+
+        def send():
+            task = asyncio.ensure_future(request())
+            starts[task] = loop.time()
+            return task
+
+        pending = {send()}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if not done:
+                log.info('%s is slow, sending hedged request', self.name)
+                pending.add(send())
+
+            error: BaseException = None
+            while done or pending:
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies.append(loop.time() - starts[task])
+                        return task.result()
+
+                    error = task.exception()
+
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+
+            raise error
+
+        finally:
+            for task in pending:
+                task.cancel()
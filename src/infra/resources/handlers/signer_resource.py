@@ -0,0 +1,172 @@
+import hmac
+import json
+import base64
+import asyncio
+import hashlib
+import aioboto3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from ._resource import ResourceHandler
+from ....configs.conf import (
+    FT_MEDIA_BUCKET,
+    STORAGE_HOST,
+    S3_REGION,
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+
+
+def _hmac_sha256(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+class S3PostPolicySignerHandler(ResourceHandler):
+    '''
+    signs presigned POST (SigV4 POST policy) locally,
+    the derived signing key is cached per day/region and
+    the credentials are refreshed in the background (probe)
+    '''
+
+    def __init__(self, session: aioboto3.Session):
+        super().__init__()
+
+        self.session = session
+        self.lock = asyncio.Lock()
+        self.region = session.region_name or S3_REGION
+        self.credentials_provider = None
+        self.credentials = None
+        # ((access_key, date_stamp, region), signing_key)
+        self.signing_key: Tuple[Tuple[str, str, str], bytes] = (None, None)
+
+
+    async def initial(self):
+        try:
+            async with self.lock:
+                self.credentials_provider = await self.session.get_credentials()
+                if self.credentials_provider is None:
+                    log.error('PostPolicySigner[S3] credentials not found')
+                    return
+
+                self.credentials = await self.credentials_provider.get_frozen_credentials()
+                log.info('Initial PostPolicySigner[S3] region: %s', self.region)
+
+        except Exception as e:
+            log.error(e.__str__())
+
+
+    async def accessing(self, **kwargs):
+        if self.credentials is None:
+            await self.initial()
+
+        return self
+
+
+    # Regular refreshing of the (temporary) credentials
+    async def probe(self):
+        try:
+            if self.credentials_provider is None:
+                await self.initial()
+                return
+
+            credentials = await self.credentials_provider.get_frozen_credentials()
+            if self.credentials is None or \
+                    (credentials.access_key, credentials.token) != \
+                    (self.credentials.access_key, self.credentials.token):
+                log.info('PostPolicySigner[S3] credentials refreshed')
+            self.credentials = credentials
+        except Exception as e:
+            log.error(f'PostPolicySigner[S3] Refresh Error: %s', e.__str__())
+
+
+    async def close(self):
+        # nothing to release, the credentials are reloaded on next access;
+        # the signing key is kept, it's scoped by access key/day/region
+        self.credentials = None
+
+
+    async def presign_post(
+        self,
+        object_key: str,
+        mime_type: str,
+        conditions: list,
+        expires_in: int,
+    ) -> (Dict):
+        signer = await self.access()
+        return signer.sign_posts([(object_key, mime_type, conditions)], expires_in)[0]
+
+
+    def sign_posts(
+        self,
+        requests: List[Tuple[str, str, list]],
+        expires_in: int,
+    ) -> (List[Dict]):
+        '''
+        requests: [(object_key, mime_type, conditions), ...],
+        the batch shares the same timestamp, credential scope and signing key
+        '''
+        credentials = self.credentials
+        if credentials is None:
+            raise ValueError('PostPolicySigner[S3] credentials not found')
+
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        date_stamp = now.strftime('%Y%m%d')
+        expiration = (now + timedelta(seconds=expires_in)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        signing_key = self.__get_signing_key(credentials, date_stamp)
+        credential = '/'.join([credentials.access_key, date_stamp, self.region, 's3', 'aws4_request'])
+        auth_fields = {
+            'x-amz-algorithm': ALGORITHM,
+            'x-amz-credential': credential,
+            'x-amz-date': amz_date,
+        }
+        if credentials.token:
+            auth_fields['x-amz-security-token'] = credentials.token
+
+        presigned_posts = []
+        for object_key, mime_type, conditions in requests:
+            policy = {
+                'expiration': expiration,
+                'conditions': [
+                    *conditions,
+                    {'bucket': FT_MEDIA_BUCKET},
+                    {'key': object_key},
+                    *[{k: v} for k, v in auth_fields.items()],
+                ],
+            }
+            policy_b64 = base64.b64encode(
+                json.dumps(policy).encode('utf-8')).decode('utf-8')
+            signature = hmac.new(
+                signing_key, policy_b64.encode('utf-8'), hashlib.sha256).hexdigest()
+
+            presigned_posts.append({
+                'url': f'{STORAGE_HOST}/',
+                'fields': {
+                    'Content-Type': mime_type,
+                    'key': object_key,
+                    **auth_fields,
+                    'policy': policy_b64,
+                    'x-amz-signature': signature,
+                },
+            })
+
+        return presigned_posts
+
+
+    def __get_signing_key(self, credentials, date_stamp: str) -> bytes:
+        scope = (credentials.access_key, date_stamp, self.region)
+        cached_scope, signing_key = self.signing_key
+        if cached_scope == scope:
+            return signing_key
+
+        k_date = _hmac_sha256(('AWS4' + credentials.secret_key).encode('utf-8'), date_stamp)
+        k_region = _hmac_sha256(k_date, self.region)
+        k_service = _hmac_sha256(k_region, 's3')
+        signing_key = _hmac_sha256(k_service, 'aws4_request')
+        self.signing_key = (scope, signing_key)
+        return signing_key
@@ -20,6 +20,13 @@ s3_config = Config(
     retries={'max_attempts': S3_MAX_ATTEMPTS}
 )
 
+# for the calls through HedgedCaller, which retries by itself
+s3_hedged_config = Config(
+    connect_timeout=S3_CONNECT_TIMEOUT,
+    read_timeout=S3_READ_TIMEOUT,
+    retries={'total_max_attempts': 1}
+)
+
 
 class S3ResourceHandler(ResourceHandler):
 
@@ -83,11 +90,12 @@ class S3ResourceHandler(ResourceHandler):
 
 class S3ResourceClientHandler(ResourceHandler):
 
-    def __init__(self, session: aioboto3.Session):
+    def __init__(self, session: aioboto3.Session, config: Config = s3_config):
         super().__init__()
         self.max_timeout = S3_CONNECT_TIMEOUT
 
         self.session = session
+        self.config = config
         self.lock = asyncio.Lock()
         self.storage_client = None
 
@@ -96,7 +104,7 @@ class S3ResourceClientHandler(ResourceHandler):
         try:
             async with self.lock:
                 if self.storage_client is None:
-                    async with self.session.client('s3', config=s3_config) as storage_client:
+                    async with self.session.client('s3', config=self.config) as storage_client:
                         self.storage_client = storage_client
                         meta = await self.storage_client.head_bucket(Bucket=FT_MEDIA_BUCKET)
                         log.info('Initial GlobalObjectStorage[S3] head_bucket ResponseMetadata(client): %s', meta['ResponseMetadata'])
@@ -104,7 +112,7 @@ class S3ResourceClientHandler(ResourceHandler):
         except Exception as e:
             log.error(e.__str__())
             async with self.lock:
-                async with self.session.client('s3', config=s3_config) as storage_client:
+                async with self.session.client('s3', config=self.config) as storage_client:
                     self.storage_client = storage_client
 
 
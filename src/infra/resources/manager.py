@@ -3,6 +3,7 @@ import aioboto3
 from typing import Dict
 from .handlers._resource import ResourceHandler
 from .handlers.storage_resource import *
+from .handlers.signer_resource import S3PostPolicySignerHandler
 from ...configs.conf import PROBE_CYCLE_SECS
 import logging
 
@@ -17,6 +18,8 @@ class GlobalResourceManager:
         self.resources: Dict[str, ResourceHandler] = {
             'storage_resource': S3ResourceHandler(session),
             'storage_client': S3ResourceClientHandler(session),
+            'storage_hedged_client': S3ResourceClientHandler(session, s3_hedged_config),
+            'storage_signer': S3PostPolicySignerHandler(session),
         }
 
     def get(self, resource: str) -> ResourceHandler:
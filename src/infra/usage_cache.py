@@ -0,0 +1,121 @@
+import time
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from ..configs.conf import (
+    USAGE_CACHE_TTL_SECS,
+    USAGE_VERSION_MAX_AGE_SECS,
+    USAGE_MAX_PENDING_KEYS,
+)
+
+
+class UsageSnapshot:
+    '''
+    storage usage of an owner folder at a point in time
+    '''
+
+    def __init__(
+        self,
+        owner_folder: str,
+        used_bytes: int,
+        object_count: int,
+        last_modified: str,
+        etags: Dict[str, str],
+    ):
+        self.used_bytes = used_bytes
+        self.computed_at = time.time()
+        # object key -> ETag, as listed
+        self.etags = etags
+        # object keys signed for uploading after the snapshot was taken -> listed ETag (None: not listed)
+        self.pending_keys: Dict[str, Optional[str]] = {}
+        # the same objects produce the same token, across instances
+        target = ':'.join([owner_folder, str(used_bytes), str(object_count), last_modified])
+        self.version = hashlib.md5(target.encode('utf-8')).hexdigest()[:16]
+
+    def age_secs(self) -> float:
+        return time.time() - self.computed_at
+
+    def meta(self, cached: bool) -> (Dict):
+        return {
+            'usage-version': self.version,
+            'usage-computed-at': datetime.fromtimestamp(self.computed_at, timezone.utc).isoformat(),
+            'usage-age-secs': round(self.age_secs(), 2),
+            'usage-cached': cached,
+        }
+
+    # the same fields, while the usage is not computed yet
+    @staticmethod
+    def empty_meta() -> (Dict):
+        return {
+            'usage-version': None,
+            'usage-computed-at': None,
+            'usage-age-secs': None,
+            'usage-cached': False,
+        }
+
+
+class UsageCache:
+    '''
+    per instance; uploads signed by another instance (Lambda) are not seen,
+    a snapshot is trusted for version_max_age_secs at most
+    '''
+
+    def __init__(
+        self,
+        ttl_secs: float = USAGE_CACHE_TTL_SECS,
+        version_max_age_secs: float = USAGE_VERSION_MAX_AGE_SECS,
+    ):
+        self.ttl_secs = ttl_secs
+        self.version_max_age_secs = version_max_age_secs
+        self.snapshots: Dict[str, UsageSnapshot] = {}
+        # owner_folder -> bumped on every eviction, a computation started
+        # before the eviction must not put its (stale) snapshot back
+        self.generations: Dict[str, int] = {}
+
+    def get(self, owner_folder: str, version: str = None) -> Optional[UsageSnapshot]:
+        snapshot = self.snapshots.get(owner_folder)
+        if snapshot is None:
+            return None
+
+        age = snapshot.age_secs()
+        if age <= self.ttl_secs:
+            return snapshot
+
+        if version == snapshot.version and age <= self.version_max_age_secs:
+            return snapshot
+
+        return None
+
+    def generation(self, owner_folder: str) -> int:
+        return self.generations.get(owner_folder, 0)
+
+    def put(self, owner_folder: str, snapshot: UsageSnapshot, generation: int):
+        if generation != self.generation(owner_folder):
+            return
+
+        # drop the snapshots which can't be served anymore
+        expired = [key for key, cached in self.snapshots.items()
+                   if cached.age_secs() > self.version_max_age_secs]
+        for key in expired:
+            del self.snapshots[key]
+
+        self.snapshots[owner_folder] = snapshot
+
+    # the usage may be changed by an upload of the object key
+    def mark_pending(self, owner_folder: str, object_key: str):
+        snapshot = self.snapshots.get(owner_folder)
+        if snapshot is None:
+            return
+
+        if object_key not in snapshot.pending_keys and \
+                len(snapshot.pending_keys) >= USAGE_MAX_PENDING_KEYS:
+            # verifying more keys costs more than listing again
+            self.evict(owner_folder)
+            return
+
+        snapshot.pending_keys[object_key] = snapshot.etags.get(object_key)
+
+    # the usage is changed
+    def evict(self, owner_folder: str):
+        self.snapshots.pop(owner_folder, None)
+        self.generations[owner_folder] = self.generation(owner_folder) + 1
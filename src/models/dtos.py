@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class UploadParamsDTO(BaseModel):
@@ -6,4 +7,15 @@ class UploadParamsDTO(BaseModel):
     role_id: str
     filename: str
     mime_type: str
-    total_mb: float
\ No newline at end of file
+    total_mb: float
+    # version token of the usage, returned by upload-params/prefetch
+    usage_version: Optional[str] = None
+
+
+class MediaListParamsDTO(BaseModel):
+    serial_num: str
+    role: str
+    role_id: str
+    cursor: Optional[str] = None
+    limit: int
+    prefix: Optional[str] = None
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from ...configs.adapters import storage_adapter
 from ...configs.exceptions import ForbiddenException, ServerException
 from ...configs.conf import *
 from ...configs.constants import *
-from ...models.dtos import UploadParamsDTO
+from ...models.dtos import UploadParamsDTO, MediaListParamsDTO
 from ...services.media_service import MediaService
 from ...utils import *
 from ..req.validation import get_mime_type
@@ -32,6 +33,8 @@ async def upload_params(
     filename: str = Query(...),
     mime_type: str = Depends(get_mime_type),
     total_mb: float = Query(MAX_TOTAL_MB),
+    # 'usage-version' of the previous payload, skips recomputing if nothing changed
+    usage_version: str = Query(None),
     # s3_client: boto3.client = Depends(get_s3_client),
 ):
     params = UploadParamsDTO(
@@ -41,6 +44,7 @@ async def upload_params(
         filename=filename,
         mime_type=mime_type,
         total_mb=total_mb,
+        usage_version=usage_version,
     )
     presigned_post = await _media_service.get_upload_params(
         params=params,
@@ -49,6 +53,16 @@ async def upload_params(
     return res_success(data=presigned_post)
 
 
+# computes the usage in background (e.g. on profile load), for the upcoming upload-params
+@router.post('/upload-params/prefetch')
+async def prefetch_upload_params(
+    role: str = Query(...),
+    role_id: str = Query(...),
+):
+    data = await _media_service.prefetch_usage(role, role_id)
+    return res_success(data=data)
+
+
 @router.get('/upload-params/overwritable')
 async def overwritable_upload_params(
     # it's unique, invariant & private, could be id/data/metadata
@@ -58,6 +72,8 @@ async def overwritable_upload_params(
     filename: str = Query(...),
     mime_type: str = Depends(get_mime_type),
     total_mb: float = Query(MAX_TOTAL_MB),
+    # 'usage-version' of the previous payload, skips recomputing if nothing changed
+    usage_version: str = Query(None),
     # s3_client: boto3.client = Depends(get_s3_client),
 ):
     params = UploadParamsDTO(
@@ -67,6 +83,7 @@ async def overwritable_upload_params(
         filename=filename,
         mime_type=mime_type,
         total_mb=total_mb,
+        usage_version=usage_version,
     )
     presigned_post = await _media_service.get_upload_params(
         params=params,
@@ -75,6 +92,38 @@ async def overwritable_upload_params(
     return res_success(data=presigned_post)
 
 
+@router.get('/media')
+async def list_media(
+    # it's unique, invariant & private, could be id/data/metadata
+    serial_num: str = Query(...),
+    role: str = Query(...),
+    role_id: str = Query(...),
+    # opaque, the 'next-cursor' of the previous page
+    cursor: str = Query(None),
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE),
+    # filename prefix
+    prefix: str = Query(None),
+    # stream all the rest as NDJSON, limit is the size of each page
+    stream: bool = Query(False),
+):
+    params = MediaListParamsDTO(
+        serial_num=serial_num,
+        role=role,
+        role_id=role_id,
+        cursor=cursor,
+        limit=limit,
+        prefix=prefix,
+    )
+    if stream:
+        return StreamingResponse(
+            _media_service.stream_media(params),
+            media_type='application/x-ndjson',
+        )
+
+    page = await _media_service.list_media(params)
+    return res_success(data=page)
+
+
 @router.delete('')
 async def remove(
     # it's unique, invariant & private, could be id/data/metadata
@@ -1,9 +1,14 @@
-from typing import Callable, Dict
+import json
+import asyncio
+from botocore.exceptions import BotoCoreError, ClientError
+from typing import AsyncIterator, Callable, Dict, List, Tuple
 from ..configs.exceptions import *
 from ..configs.conf import *
 from ..configs.constants import *
 from ..configs.adapters import StorageAdapter
-from ..models.dtos import UploadParamsDTO
+from ..infra.hedged_call import Deadline, HedgedCaller
+from ..infra.usage_cache import UsageCache, UsageSnapshot
+from ..models.dtos import UploadParamsDTO, MediaListParamsDTO
 from ..utils import *
 import logging as log
 
@@ -17,15 +22,61 @@ CONTENT_LENGTH_RANGE = ['content-length-range',
 class MediaService:
     def __init__(self, storage_adapter: StorageAdapter):
         self.s3_client = storage_adapter.client
+        self.s3_hedged_client = storage_adapter.hedged_client
         self.s3_resource = storage_adapter.resource
+        self.s3_signer = storage_adapter.signer
+        # latency distributions differ per operation, so does the hedge delay
+        self.list_caller = HedgedCaller('s3.list_objects')
+        self.list_media_caller = HedgedCaller('s3.list_objects_v2')
+        self.usage_cache = UsageCache()
+        # owner_folder -> in-flight (prefetching) usage computation
+        self.usage_tasks: Dict[str, asyncio.Task] = {}
+
+    async def prefetch_usage(
+        self,
+        role: str,
+        role_id: str,
+    ) -> (Dict):
+        owner_folder = get_owner_folder(role, role_id)
+        snapshot = self.usage_cache.get(owner_folder)
+        if snapshot is not None:
+            return {
+                'prefetching': False,
+                'currently-used-mb': round(snapshot.used_bytes / MB, 2),
+                **snapshot.meta(cached=True),
+            }
+
+        task = self.usage_tasks.get(owner_folder)
+        if task is None:
+            task = self.__schedule_usage(owner_folder)
+
+        # the background task may not progress after the response (Lambda)
+        try:
+            snapshot = await asyncio.wait_for(asyncio.shield(task), USAGE_PREFETCH_WAIT_SECS)
+        except asyncio.TimeoutError:
+            log.info('Usage is still prefetching: %s', owner_folder)
+            return {
+                'prefetching': True,
+                'currently-used-mb': None,
+                **UsageSnapshot.empty_meta(),
+            }
+
+        return {
+            'prefetching': False,
+            'currently-used-mb': round(snapshot.used_bytes / MB, 2),
+            **snapshot.meta(cached=False),
+        }
 
     async def get_upload_params(
         self,
         params: UploadParamsDTO,
         get_object_key: Callable[[str, str, str], str]
     ) -> (Dict):
+        deadline = Deadline()
         owner_folder = get_owner_folder(params.role, params.role_id)
-        currently_used_mb = await self.__get_currently_used_mb(owner_folder)
+        snapshot, cached = await self.__get_usage(
+            owner_folder, params.usage_version, deadline)
+        currently_used_mb = round(snapshot.used_bytes / MB, 2)
         if currently_used_mb >= params.total_mb:
             raise ForbiddenException(
                 msg=f'You are not allowed to upload more files, available sizes: {params.total_mb} MB')
@@ -46,7 +97,11 @@ class MediaService:
             'currently-used-mb': currently_used_mb,
             'total-available-mb': params.total_mb,
             'used-percentage': get_percent_usage(currently_used_mb, params.total_mb),
+            **snapshot.meta(cached),
         })
+
+        # the usage may be changed by the upload
+        self.usage_cache.mark_pending(owner_folder, object_key)
         return presigned_post
 
     async def __gen_presigned_post(
@@ -56,16 +111,12 @@ class MediaService:
         conditions: list,
     ):
         try:
-            # get signed url for uploading
-            client = await self.s3_client.access()
-            presigned_post = await client.generate_presigned_post(
-                Bucket=FT_MEDIA_BUCKET,
-                Key=object_key,
-                Fields={
-                    'Content-Type': mime_type
-                },
-                Conditions=conditions,
-                ExpiresIn=URL_EXPIRE_SECS
+            # get signed url for uploading, signed locally (no client lock)
+            presigned_post = await self.s3_signer.presign_post(
+                object_key,
+                mime_type,
+                conditions,
+                URL_EXPIRE_SECS,
             )
             presigned_post.update({
                 'media-link': f'{STORAGE_HOST}/{object_key}',
@@ -76,17 +127,231 @@ class MediaService:
 
         return presigned_post
 
-    async def __get_currently_used_mb(
+    async def __get_usage(
         self,
-        owner_folder: str
-    ):
-        client = await self.s3_client.access()
-        paginator = client.get_paginator('list_objects')
+        owner_folder: str,
+        usage_version: str,
+        deadline: Deadline,
+    ) -> (Tuple[UsageSnapshot, bool]):
+        snapshot = self.usage_cache.get(owner_folder, usage_version)
+        if snapshot is not None and await self.__is_unchanged(snapshot, deadline):
+            return snapshot, True
+
+        task = self.usage_tasks.get(owner_folder)
+        if task is None:
+            generation = self.usage_cache.generation(owner_folder)
+            snapshot = await self.__compute_usage(owner_folder, deadline)
+            self.usage_cache.put(owner_folder, snapshot, generation)
+            return snapshot, False
+
+        # join the in-flight prefetching instead of listing again
+        try:
+            snapshot = await asyncio.wait_for(asyncio.shield(task), deadline.remaining())
+        except asyncio.TimeoutError as e:
+            log.error('Error prefetching usage: %s', e)
+            raise ServerException(msg='Timeout to get currently used sizes')
+
+        return snapshot, False
+
+    async def __is_unchanged(
+        self,
+        snapshot: UsageSnapshot,
+        deadline: Deadline,
+    ) -> (bool):
+        if not snapshot.pending_keys:
+            return True
+
+        # a HEAD per signed key is cheaper than listing the whole folder
+        try:
+            client = await self.s3_client.access()
+            current_etags = await asyncio.wait_for(
+                asyncio.gather(*[
+                    self.__head_etag(client, object_key)
+                    for object_key in snapshot.pending_keys
+                ]),
+                deadline.remaining(),
+            )
+
+        except Exception as e:
+            log.info('Usage snapshot is not verified: %s', e)
+            return False
+
+        # uploaded, overwritten or removed since the snapshot
+        return list(snapshot.pending_keys.values()) == current_etags
+
+    async def __head_etag(self, client, object_key: str):
+        try:
+            meta = await client.head_object(Bucket=FT_MEDIA_BUCKET, Key=object_key)
+            return meta['ETag']
+
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def __schedule_usage(self, owner_folder: str):
+        generation = self.usage_cache.generation(owner_folder)
+        task = asyncio.create_task(self.__compute_usage(owner_folder, Deadline()))
+        self.usage_tasks[owner_folder] = task
+        task.add_done_callback(
+            lambda done: self.__on_usage_computed(owner_folder, generation, done))
+        return task
+
+    def __on_usage_computed(self, owner_folder: str, generation: int, task: asyncio.Task):
+        if self.usage_tasks.get(owner_folder) is task:
+            del self.usage_tasks[owner_folder]
+        if task.cancelled():
+            return
+
+        if task.exception() is not None:
+            log.error('Error prefetching usage: %s', task.exception())
+            return
+
+        self.usage_cache.put(owner_folder, task.result(), generation)
+
+    async def __compute_usage(
+        self,
+        owner_folder: str,
+        deadline: Deadline,
+    ) -> (UsageSnapshot):
+        client = await self.s3_hedged_client.access()
         currently_used_bytes = 0
-        async for page in paginator.paginate(Bucket=FT_MEDIA_BUCKET, Prefix=owner_folder):
-            for content in page.get('Contents', []):
-                currently_used_bytes += content['Size']
-        return round(currently_used_bytes / MB, 2)
+        object_count = 0
+        last_modified = ''
+        etags = {}
+        marker = ''
+        try:
+            # paginate by hand, so that every page is hedged & bounded by the deadline
+            while True:
+                page = await self.list_caller.call(
+                    lambda: client.list_objects(
+                        Bucket=FT_MEDIA_BUCKET,
+                        Prefix=owner_folder,
+                        Marker=marker,
+                    ),
+                    deadline,
+                )
+                contents = page.get('Contents', [])
+                for content in contents:
+                    currently_used_bytes += content['Size']
+                    object_count += 1
+                    etags[content['Key']] = content['ETag']
+                    last_modified = max(last_modified, content['LastModified'].isoformat())
+
+                if not page.get('IsTruncated') or not contents:
+                    break
+                marker = page.get('NextMarker', contents[-1]['Key'])
+
+        except asyncio.TimeoutError as e:
+            log.error('Error listing files: %s', e)
+            raise ServerException(msg='Timeout to get currently used sizes')
+
+        except (ClientError, BotoCoreError) as e:
+            log.error('Error listing files: %s', e)
+            raise ServerException(msg='Failed to get currently used sizes')
+
+        return UsageSnapshot(
+            owner_folder,
+            currently_used_bytes,
+            object_count,
+            last_modified,
+            etags,
+        )
+
+    async def list_media(
+        self,
+        params: MediaListParamsDTO,
+    ) -> (Dict):
+        token = self.__parse_cursor(params.cursor)
+        page = await self.__list_media_page(params, token)
+        next_token = page.get('NextContinuationToken')
+        return {
+            'items': self.__media_entries(page, params.prefix),
+            'next-cursor': encode_cursor(next_token) if next_token else None,
+        }
+
+    def stream_media(
+        self,
+        params: MediaListParamsDTO,
+    ) -> AsyncIterator[str]:
+        # the cursor is verified before the response (status code) is sent
+        token = self.__parse_cursor(params.cursor)
+        return self.__stream_media_pages(params, token)
+
+    async def __stream_media_pages(
+        self,
+        params: MediaListParamsDTO,
+        token: str,
+    ) -> AsyncIterator[str]:
+        # NDJSON, one entry per line; pages are fetched lazily while streaming
+        while True:
+            page = await self.__list_media_page(params, token)
+            for entry in self.__media_entries(page, params.prefix):
+                yield json.dumps(entry) + '\n'
+
+            token = page.get('NextContinuationToken')
+            if not token:
+                break
+
+    def __parse_cursor(self, cursor: str):
+        if not cursor:
+            return None
+
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise ClientException(msg='Invalid cursor')
+
+    async def __list_media_page(
+        self,
+        params: MediaListParamsDTO,
+        token: str,
+    ) -> (Dict):
+        owner_folder = get_owner_folder(params.role, params.role_id)
+        sign = generate_sign(params.serial_num, owner_folder)
+        kwargs = {
+            'Bucket': FT_MEDIA_BUCKET,
+            'Prefix': f'{owner_folder}/{sign}-',
+            'MaxKeys': params.limit,
+        }
+        if token:
+            kwargs['ContinuationToken'] = token
+
+        try:
+            client = await self.s3_hedged_client.access()
+            return await self.list_media_caller.call(
+                lambda: client.list_objects_v2(**kwargs),
+                Deadline(),
+            )
+
+        except asyncio.TimeoutError as e:
+            log.error('Error listing files: %s', e)
+            raise ServerException(msg='Timeout to list files')
+
+        except ClientError as e:
+            log.error('Error listing files: %s', e)
+            if token and e.response['Error']['Code'] == 'InvalidArgument':
+                raise ClientException(msg='Invalid cursor')
+            raise ServerException(msg='Failed to list files')
+
+    def __media_entries(
+        self,
+        page: Dict,
+        filename_prefix: str,
+    ) -> (List[Dict]):
+        entries = []
+        for content in page.get('Contents', []):
+            object_key = content['Key']
+            if filename_prefix and not match_filename_prefix(object_key, filename_prefix):
+                continue
+
+            entries.append({
+                'object-key': object_key,
+                'media-link': f'{STORAGE_HOST}/{object_key}',
+                'size': content['Size'],
+                'last-modified': content['LastModified'].isoformat(),
+            })
+        return entries
 
     async def remove(
         self,
@@ -112,6 +377,9 @@ class MediaService:
             log.error('Error deleting file: %s', e)
             raise ServerException(msg='Failed to remove file')
 
+        self.usage_cache.evict(owner_folder)
+        # a computation started before the removal is not joined anymore
+        self.usage_tasks.pop(owner_folder, None)
         return {
             'deleted': '/'.join([STORAGE_HOST, object_key]),
         }
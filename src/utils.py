@@ -1,3 +1,4 @@
+import base64
 import hashlib
 import time
 import logging as log
@@ -22,11 +23,21 @@ def generate_sign(serial_num: str, owner_folder: str):
     return result.hexdigest()[:10]
 
 
+def get_object_key_ts() -> int:
+    # the same filename uploaded in 1000000 secs will be overwritten
+    return int(time.time() / 1000000)
+
+
+def is_object_key_ts(ts: str) -> bool:
+    # a ts of get_object_key_ts(), issued already (not a filename like 2024-...)
+    current_ts = str(get_object_key_ts())
+    return ts.isdigit() and len(ts) == len(current_ts) and ts <= current_ts
+
+
 def get_signed_object_key(serial_num: str, owner_folder: str, filename: str) -> str:
     sign = generate_sign(serial_num, owner_folder)
 
-    # the same filename uploaded in 1000000 secs will be overwritten
-    ts = int(time.time() / 1000000)
+    ts = get_object_key_ts()
 
     new_filename = '-'.join([sign, str(ts), filename])
     return '/'.join([owner_folder, new_filename])
@@ -38,6 +49,28 @@ def get_signed_overwritable_object_key(serial_num: str, owner_folder: str, filen
     return '/'.join([owner_folder, new_filename])
 
 
+def match_filename_prefix(object_key: str, filename_prefix: str) -> bool:
+    # object key: {owner_folder}/{sign}-{ts}-{filename} or {owner_folder}/{sign}-{filename}
+    name = object_key.split('/')[-1].split('-', 1)[-1]
+    ts, sep, filename = name.partition('-')
+    if not (sep and is_object_key_ts(ts)):
+        filename = name
+
+    return filename.startswith(filename_prefix)
+
+
+def encode_cursor(continuation_token: str) -> str:
+    return base64.urlsafe_b64encode(continuation_token.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> str:
+    # raises ValueError on a malformed/empty cursor
+    token = base64.b64decode(cursor.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8')
+    if not token:
+        raise ValueError('empty cursor')
+    return token
+
+
 def parse_owner_folder(object_key: str):
     parts = object_key.split('/')
     return '/'.join(parts[:2])
@@ -0,0 +1,34 @@
+import asyncio
+from botocore.exceptions import ClientError
+
+
+def client_error(code: str, status_code: int = 400, operation: str = 'ListObjects') -> ClientError:
+    return ClientError(
+        {
+            'Error': {'Code': code, 'Message': code},
+            'ResponseMetadata': {'HTTPStatusCode': status_code},
+        },
+        operation,
+    )
+
+
+class FakeResourceHandler:
+    '''
+    stands in for S3ResourceClientHandler, access() returns the given client
+    '''
+
+    def __init__(self, client):
+        self.client = client
+
+    async def access(self, **kwargs):
+        return self.client
+
+
+def run(coro):
+    # the HTTP exceptions of the repo can't be repr()-ed (no detail),
+    # which asyncio.run does while cleaning up
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
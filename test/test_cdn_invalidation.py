@@ -0,0 +1,123 @@
+import json
+import asyncio
+import pytest
+import main
+from src.infra import cdn_client
+from src.infra.cdn_client import LocalCDNClient
+from src.infra.cdn_invalidation import InvalidationQueue, changed_paths
+
+
+class FlakyCDNClient(LocalCDNClient):
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    async def invalidate(self, paths):
+        self.attempts += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError('CDN is unavailable')
+
+        await super().invalidate(paths)
+
+
+def sqs_event(*object_keys: str, test_event: bool = False):
+    notification = {'Event': 's3:TestEvent'} if test_event else {
+        'Records': [{'s3': {'object': {'key': key}}} for key in object_keys],
+    }
+    return {'Records': [{'body': json.dumps(notification)}]}
+
+
+def test_coalesce_same_path():
+    client = LocalCDNClient()
+    queue = InvalidationQueue(client, batch_size=10)
+
+    async def run():
+        queue.put('/a')
+        queue.put('/a')
+        queue.put('/b')
+        return await queue.flush()
+
+    assert asyncio.run(run()) == []
+    assert client.invalidations == [['/a', '/b']]
+    assert queue.paths == set()
+
+
+def test_batch_size():
+    client = LocalCDNClient()
+    queue = InvalidationQueue(client, batch_size=2)
+
+    async def run():
+        for path in ['/a', '/b', '/c', '/d', '/e']:
+            queue.put(path)
+        return await queue.flush()
+
+    assert asyncio.run(run()) == []
+    assert client.invalidations == [['/a', '/b'], ['/c', '/d'], ['/e']]
+
+
+def test_retry_then_sent():
+    client = FlakyCDNClient(failures=1)
+    queue = InvalidationQueue(client, batch_size=10, max_attempts=2)
+
+    async def run():
+        queue.put('/a')
+        return await queue.flush()
+
+    assert asyncio.run(run()) == []
+    assert client.attempts == 2
+    assert client.invalidations == [['/a']]
+
+
+def test_unsent_after_all_attempts():
+    client = FlakyCDNClient(failures=2)
+    queue = InvalidationQueue(client, batch_size=1, max_attempts=1)
+
+    async def run():
+        queue.put('/a')
+        queue.put('/b')
+        queue.put('/c')
+        return await queue.flush()
+
+    # the first two batches fail, they are returned instead of being queued again
+    assert asyncio.run(run()) == ['/a', '/b']
+    assert client.invalidations == [['/c']]
+    assert queue.paths == set()
+
+
+def test_changed_paths():
+    event = sqs_event('teacher/1/abc-photo.png', 'teacher/1/abc-my+photo%28a%29.png')
+    event['Records'].append(sqs_event(test_event=True)['Records'][0])
+
+    assert changed_paths(event) == [
+        '/teacher/1/abc-photo.png',
+        '/teacher/1/abc-my photo(a).png',
+    ]
+
+
+def test_handler_sends_one_batch(monkeypatch):
+    client = LocalCDNClient()
+    monkeypatch.setattr(main, 'cdn_invalidation_queue', InvalidationQueue(client, batch_size=10))
+
+    event = sqs_event('teacher/1/abc-a.png', 'teacher/1/abc-b.png', 'teacher/1/abc-a.png')
+    main.media_events_handler(event, None)
+    assert client.invalidations == [['/teacher/1/abc-a.png', '/teacher/1/abc-b.png']]
+
+
+def test_handler_fails_on_unsent(monkeypatch):
+    client = FlakyCDNClient(failures=1)
+    monkeypatch.setattr(main, 'cdn_invalidation_queue',
+                        InvalidationQueue(client, batch_size=10, max_attempts=1))
+
+    with pytest.raises(RuntimeError):
+        main.media_events_handler(sqs_event('teacher/1/abc-a.png'), None)
+
+
+def test_local_client_not_on_deployed_stage(monkeypatch):
+    monkeypatch.setattr(cdn_client, 'CDN_CLIENT', 'local')
+    monkeypatch.setattr(cdn_client, 'STAGE', 'dev')
+
+    with pytest.raises(ValueError):
+        cdn_client.get_cdn_client()
@@ -0,0 +1,144 @@
+import time
+import asyncio
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from src.infra.hedged_call import Deadline, HedgedCaller, is_transient
+from .fakes import client_error
+
+
+class FakeRequests:
+    '''
+    factory of fake awaitables, the n-th request sleeps delays[n] then returns n
+    '''
+
+    def __init__(self, *delays: float):
+        self.delays = delays
+        self.sent = 0
+        self.cancelled = []
+
+    def __call__(self):
+        index = self.sent
+        self.sent += 1
+        return self.__request(index)
+
+    async def __request(self, index: int):
+        try:
+            await asyncio.sleep(self.delays[index])
+            return index
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+
+
+class FailingRequests:
+
+    def __init__(self, error: Exception):
+        self.error = error
+        self.sent = 0
+
+    def __call__(self):
+        self.sent += 1
+        return self.__request()
+
+    async def __request(self):
+        raise self.error
+
+
+def test_deadline():
+    deadline = Deadline(0.05)
+    assert 0 < deadline.remaining() <= 0.05
+    assert not deadline.expired()
+
+    time.sleep(0.06)
+    assert deadline.remaining() == 0.0
+    assert deadline.expired()
+
+
+def test_no_hedge_when_fast():
+    caller = HedgedCaller('test', max_delay=0.1)
+    requests = FakeRequests(0.01)
+
+    result = asyncio.run(caller.call(requests, Deadline(1)))
+    assert result == 0
+    assert requests.sent == 1
+
+
+def test_hedge_fires_and_faster_wins():
+    caller = HedgedCaller('test', max_delay=0.05)
+    requests = FakeRequests(1.0, 0.01)
+
+    async def run():
+        start = time.monotonic()
+        result = await caller.call(requests, Deadline(2))
+        return result, time.monotonic() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result == 1
+    assert requests.sent == 2
+    assert 0.05 <= elapsed < 0.5
+
+
+def test_loser_is_cancelled():
+    caller = HedgedCaller('test', max_delay=0.05)
+    requests = FakeRequests(1.0, 0.01)
+
+    asyncio.run(caller.call(requests, Deadline(2)))
+    assert requests.cancelled == [0]
+
+
+def test_latency_of_the_winner_only():
+    caller = HedgedCaller('test', max_delay=0.05)
+    requests = FakeRequests(1.0, 0.01)
+
+    asyncio.run(caller.call(requests, Deadline(2)))
+    # the hedge delay is not part of the hedged request's latency
+    assert len(caller.latencies) == 1
+    assert caller.latencies[0] < 0.05
+
+
+def test_non_transient_error_is_not_retried():
+    caller = HedgedCaller('test', max_delay=0.05, max_attempts=3)
+    requests = FailingRequests(client_error('AccessDenied', 403))
+
+    with pytest.raises(Exception) as exc:
+        asyncio.run(caller.call(requests, Deadline(2)))
+    assert exc.value.response['Error']['Code'] == 'AccessDenied'
+    assert requests.sent == 1
+
+
+def test_transient_error_is_retried_up_to_max_attempts():
+    caller = HedgedCaller('test', max_delay=0.05, max_attempts=3)
+    requests = FailingRequests(client_error('SlowDown', 503))
+
+    with pytest.raises(Exception) as exc:
+        asyncio.run(caller.call(requests, Deadline(2)))
+    assert exc.value.response['Error']['Code'] == 'SlowDown'
+    assert requests.sent == 3
+
+
+def test_timeout_at_deadline():
+    caller = HedgedCaller('test', max_delay=0.05)
+    requests = FakeRequests(5.0, 5.0)
+
+    async def run():
+        start = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await caller.call(requests, Deadline(0.1))
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.5
+    assert sorted(requests.cancelled) == [0, 1]
+
+
+def test_is_transient():
+    assert is_transient(client_error('SlowDown', 503))
+    assert is_transient(client_error('Throttling', 400))
+    assert is_transient(client_error('Whatever', 500))
+    assert is_transient(EndpointConnectionError(endpoint_url='https://s3'))
+    assert is_transient(asyncio.TimeoutError())
+
+    assert not is_transient(client_error('AccessDenied', 403))
+    assert not is_transient(client_error('NoSuchBucket', 404))
+    assert not is_transient(client_error('InvalidArgument', 400))
+    assert not is_transient(ValueError('bug'))
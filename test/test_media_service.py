@@ -0,0 +1,177 @@
+import asyncio
+import datetime
+import pytest
+from src.configs.adapters import StorageAdapter
+from src.configs.exceptions import ClientException, ServerException
+from src.models.dtos import MediaListParamsDTO, UploadParamsDTO
+from src.infra.hedged_call import Deadline
+from src.infra.usage_cache import UsageSnapshot
+from src.services.media_service import MediaService
+from src.utils import encode_cursor, get_signed_object_key
+from .fakes import client_error, run, FakeResourceHandler
+
+
+class FakeS3Client:
+
+    def __init__(
+        self,
+        list_error: Exception = None,
+        contents: list = None,
+        heads: dict = None,
+    ):
+        self.list_error = list_error
+        self.contents = contents or []
+        # object key -> ETag or the error of HEAD
+        self.heads = heads or {}
+        self.list_calls = []
+        self.listing = asyncio.Event()
+        self.listing.set()
+
+    async def list_objects(self, **kwargs):
+        await self.listing.wait()
+        if self.list_error is not None:
+            raise self.list_error
+        return {'Contents': self.contents, 'IsTruncated': False}
+
+    async def list_objects_v2(self, **kwargs):
+        self.list_calls.append(kwargs)
+        raise self.list_error
+
+    async def head_object(self, Bucket: str, Key: str):
+        head = self.heads.get(Key, client_error('404', 404, 'HeadObject'))
+        if isinstance(head, Exception):
+            raise head
+        return {'ETag': head}
+
+    async def delete_object(self, Bucket: str, Key: str):
+        return {}
+
+
+def media_service(client) -> MediaService:
+    adapter = StorageAdapter.construct(
+        resource=None,
+        client=FakeResourceHandler(client),
+        hedged_client=FakeResourceHandler(client),
+        signer=None,
+    )
+    return MediaService(adapter)
+
+
+def upload_params() -> UploadParamsDTO:
+    return UploadParamsDTO(
+        serial_num='serial',
+        role='teacher',
+        role_id='1',
+        filename='photo.png',
+        mime_type='image/png',
+        total_mb=8.0,
+    )
+
+
+@pytest.mark.parametrize('error', [
+    client_error('AccessDenied', 403),
+    client_error('SlowDown', 503),
+])
+def test_usage_listing_error_is_server_exception(error):
+    service = media_service(FakeS3Client(list_error=error))
+
+    with pytest.raises(ServerException) as exc:
+        run(service.get_upload_params(upload_params(), get_signed_object_key))
+    assert exc.value.status_code == 500
+
+
+def list_params(cursor: str = None) -> MediaListParamsDTO:
+    return MediaListParamsDTO(
+        serial_num='serial',
+        role='teacher',
+        role_id='1',
+        cursor=cursor,
+        limit=10,
+    )
+
+
+def test_invalid_continuation_token_is_client_exception():
+    client = FakeS3Client(list_error=client_error('InvalidArgument', 400, 'ListObjectsV2'))
+    service = media_service(client)
+
+    with pytest.raises(ClientException) as exc:
+        run(service.list_media(list_params(cursor=encode_cursor('abc'))))
+    assert exc.value.status_code == 400
+    assert exc.value.msg == 'Invalid cursor'
+    # not retried
+    assert len(client.list_calls) == 1
+    assert client.list_calls[0]['ContinuationToken'] == 'abc'
+
+
+def test_malformed_cursor_is_client_exception():
+    client = FakeS3Client(list_error=client_error('InvalidArgument', 400, 'ListObjectsV2'))
+    service = media_service(client)
+
+    with pytest.raises(ClientException):
+        run(service.list_media(list_params(cursor='!!!')))
+    assert client.list_calls == []
+
+
+def test_listing_error_without_cursor_is_server_exception():
+    client = FakeS3Client(list_error=client_error('AccessDenied', 403, 'ListObjectsV2'))
+    service = media_service(client)
+
+    with pytest.raises(ServerException):
+        run(service.list_media(list_params()))
+
+
+def pending_snapshot(etags: dict, pending_keys: dict) -> UsageSnapshot:
+    snapshot = UsageSnapshot('teacher/1', 1024, len(etags), '', etags)
+    snapshot.pending_keys = pending_keys
+    return snapshot
+
+
+@pytest.mark.parametrize('listed, pending, heads, unchanged', [
+    # nothing signed since the snapshot
+    ({}, {}, {}, True),
+    # signed, not uploaded yet
+    ({}, {'teacher/1/a.png': None}, {}, True),
+    # signed & uploaded
+    ({}, {'teacher/1/a.png': None}, {'teacher/1/a.png': '"e1"'}, False),
+    # overwritable, not overwritten
+    ({'teacher/1/a.png': '"e1"'}, {'teacher/1/a.png': '"e1"'}, {'teacher/1/a.png': '"e1"'}, True),
+    # overwritable, overwritten
+    ({'teacher/1/a.png': '"e1"'}, {'teacher/1/a.png': '"e1"'}, {'teacher/1/a.png': '"e2"'}, False),
+    # removed
+    ({'teacher/1/a.png': '"e1"'}, {'teacher/1/a.png': '"e1"'}, {}, False),
+    # unknown
+    ({}, {'teacher/1/a.png': None},
+     {'teacher/1/a.png': client_error('AccessDenied', 403, 'HeadObject')}, False),
+])
+def test_is_unchanged(listed, pending, heads, unchanged):
+    service = media_service(FakeS3Client(heads=heads))
+    snapshot = pending_snapshot(listed, pending)
+
+    result = run(service._MediaService__is_unchanged(snapshot, Deadline(1)))
+    assert result is unchanged
+
+
+def test_usage_computed_before_removal_is_not_cached():
+    client = FakeS3Client(contents=[{
+        'Key': 'teacher/1/x.png',
+        'Size': 1024,
+        'ETag': '"e1"',
+        'LastModified': datetime.datetime(2024, 5, 6, tzinfo=datetime.timezone.utc),
+    }])
+    client.listing.clear()
+    service = media_service(client)
+    object_key = get_signed_object_key('serial', 'teacher/1', 'x.png')
+
+    async def scenario():
+        # prefetching; the listing is taken before the removal
+        task = service._MediaService__schedule_usage('teacher/1')
+        await asyncio.sleep(0)
+        await service.remove('serial', object_key)
+
+        client.listing.set()
+        await task
+        await asyncio.sleep(0)
+
+    run(scenario())
+    assert service.usage_cache.get('teacher/1') is None
+    assert service.usage_tasks == {}
@@ -0,0 +1,106 @@
+import base64
+import datetime
+import json
+import types
+import pytest
+import botocore.auth
+import botocore.session
+import botocore.signers
+from botocore.config import Config
+from botocore.credentials import Credentials
+from src.configs.conf import FT_MEDIA_BUCKET, URL_EXPIRE_SECS
+from src.infra.resources.handlers import signer_resource
+from src.infra.resources.handlers.signer_resource import S3PostPolicySignerHandler
+from src.services.media_service import CONTENT_LENGTH_RANGE
+from .fakes import run
+
+
+NOW = datetime.datetime(2024, 5, 6, 7, 8, 9)
+REGION = 'ap-northeast-1'
+OBJECT_KEY = 'teacher/1/abcdef0123-1714-photo.png'
+MIME_TYPE = 'image/png'
+
+
+class FrozenDatetime(datetime.datetime):
+
+    @classmethod
+    def utcnow(cls):
+        return NOW
+
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.replace(tzinfo=tz)
+
+
+class FakeSession:
+    region_name = REGION
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(monkeypatch):
+    frozen = types.SimpleNamespace(datetime=FrozenDatetime, timedelta=datetime.timedelta)
+    monkeypatch.setattr(botocore.auth, 'datetime', frozen)
+    monkeypatch.setattr(botocore.signers, 'datetime', frozen)
+    monkeypatch.setattr(signer_resource, 'datetime', FrozenDatetime)
+
+
+def conditions():
+    return [
+        CONTENT_LENGTH_RANGE,
+        ['starts-with', '$Content-Type', MIME_TYPE],
+    ]
+
+
+def botocore_presigned_post(token):
+    client = botocore.session.get_session().create_client(
+        's3',
+        region_name=REGION,
+        aws_access_key_id='AKIDEXAMPLE',
+        aws_secret_access_key='wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY',
+        aws_session_token=token,
+        config=Config(signature_version='s3v4'),
+    )
+    return client.generate_presigned_post(
+        Bucket=FT_MEDIA_BUCKET,
+        Key=OBJECT_KEY,
+        Fields={'Content-Type': MIME_TYPE},
+        Conditions=conditions(),
+        ExpiresIn=URL_EXPIRE_SECS,
+    )
+
+
+def local_presigned_post(token):
+    signer = S3PostPolicySignerHandler(FakeSession())
+    signer.credentials = Credentials(
+        'AKIDEXAMPLE',
+        'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY',
+        token,
+    ).get_frozen_credentials()
+    return signer.sign_posts([(OBJECT_KEY, MIME_TYPE, conditions())], URL_EXPIRE_SECS)[0]
+
+
+@pytest.mark.parametrize('token', [None, 'FQoGZXIvYXdzEXAMPLETOKEN'])
+def test_same_as_botocore(token):
+    expected = botocore_presigned_post(token)
+    actual = local_presigned_post(token)
+
+    assert actual['url'] == expected['url']
+    assert set(actual['fields']) == set(expected['fields'])
+    for name, value in expected['fields'].items():
+        assert actual['fields'][name] == value, name
+
+    policy = json.loads(base64.b64decode(actual['fields']['policy']))
+    assert policy == json.loads(base64.b64decode(expected['fields']['policy']))
+    assert ('x-amz-security-token' in actual['fields']) is (token is not None)
+
+
+def test_signing_key_cached_across_close():
+    signer = S3PostPolicySignerHandler(FakeSession())
+    signer.credentials = Credentials('AKIDEXAMPLE', 'secret').get_frozen_credentials()
+    signer.sign_posts([(OBJECT_KEY, MIME_TYPE, conditions())], URL_EXPIRE_SECS)
+    scope, signing_key = signer.signing_key
+    assert scope == ('AKIDEXAMPLE', '20240506', REGION)
+
+    run(signer.close())
+    assert signer.credentials is None
+    assert signer.signing_key == (scope, signing_key)
@@ -0,0 +1,87 @@
+from src.configs.conf import USAGE_MAX_PENDING_KEYS
+from src.infra.usage_cache import UsageCache, UsageSnapshot
+
+
+OWNER_FOLDER = 'teacher/1'
+
+
+def snapshot(age_secs: float = 0.0, etags=None) -> UsageSnapshot:
+    usage = UsageSnapshot(OWNER_FOLDER, 1024, 1, '2024-05-06T07:08:09+00:00', etags or {})
+    usage.computed_at -= age_secs
+    return usage
+
+
+def cache_with(usage: UsageSnapshot) -> UsageCache:
+    cache = UsageCache(ttl_secs=30, version_max_age_secs=60)
+    cache.put(OWNER_FOLDER, usage, cache.generation(OWNER_FOLDER))
+    return cache
+
+
+def test_get_within_ttl():
+    usage = snapshot(age_secs=10)
+    assert cache_with(usage).get(OWNER_FOLDER) is usage
+
+
+def test_get_after_ttl_needs_version():
+    usage = snapshot(age_secs=40)
+    cache = cache_with(usage)
+
+    assert cache.get(OWNER_FOLDER) is None
+    assert cache.get(OWNER_FOLDER, 'another-version') is None
+    assert cache.get(OWNER_FOLDER, usage.version) is usage
+
+
+def test_get_after_max_age():
+    usage = snapshot(age_secs=70)
+    assert cache_with(usage).get(OWNER_FOLDER, usage.version) is None
+
+
+def test_version_is_stable_across_instances():
+    assert snapshot().version == snapshot().version
+
+
+def test_put_drops_expired_snapshots():
+    cache = cache_with(snapshot(age_secs=70))
+    cache.put('teacher/2', snapshot(), cache.generation('teacher/2'))
+    assert OWNER_FOLDER not in cache.snapshots
+
+
+def test_put_skipped_after_eviction():
+    cache = UsageCache()
+    generation = cache.generation(OWNER_FOLDER)
+    # removed while computing
+    cache.evict(OWNER_FOLDER)
+
+    cache.put(OWNER_FOLDER, snapshot(), generation)
+    assert cache.get(OWNER_FOLDER) is None
+
+    cache.put(OWNER_FOLDER, snapshot(), cache.generation(OWNER_FOLDER))
+    assert cache.get(OWNER_FOLDER) is not None
+
+
+def test_mark_pending_records_listed_etag():
+    usage = snapshot(etags={'teacher/1/a.png': '"e1"'})
+    cache = cache_with(usage)
+
+    cache.mark_pending(OWNER_FOLDER, 'teacher/1/a.png')
+    cache.mark_pending(OWNER_FOLDER, 'teacher/1/b.png')
+    assert usage.pending_keys == {'teacher/1/a.png': '"e1"', 'teacher/1/b.png': None}
+
+
+def test_mark_pending_without_snapshot():
+    cache = UsageCache()
+    cache.mark_pending(OWNER_FOLDER, 'teacher/1/a.png')
+    assert cache.snapshots == {}
+
+
+def test_mark_pending_cap_evicts():
+    usage = snapshot()
+    cache = cache_with(usage)
+    for i in range(USAGE_MAX_PENDING_KEYS):
+        cache.mark_pending(OWNER_FOLDER, f'teacher/1/{i}.png')
+    # the same key again is not counted twice
+    cache.mark_pending(OWNER_FOLDER, 'teacher/1/0.png')
+    assert cache.get(OWNER_FOLDER) is usage
+
+    cache.mark_pending(OWNER_FOLDER, 'teacher/1/more.png')
+    assert cache.get(OWNER_FOLDER) is None
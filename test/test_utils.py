@@ -0,0 +1,63 @@
+import base64
+import pytest
+from src.utils import (
+    decode_cursor,
+    encode_cursor,
+    get_object_key_ts,
+    get_signed_object_key,
+    get_signed_overwritable_object_key,
+    match_filename_prefix,
+)
+
+
+OWNER_FOLDER = 'teacher/1'
+
+
+@pytest.mark.parametrize('filename, prefix, matched', [
+    ('photo.png', 'ph', True),
+    ('photo.png', 'photo.png', True),
+    ('photo.png', 'x', False),
+    # the ts of the key is not part of the filename
+    ('photo.png', str(get_object_key_ts())[:2], False),
+    ('2024-photo.png', '2024', True),
+])
+def test_match_filename_prefix_signed(filename, prefix, matched):
+    object_key = get_signed_object_key('serial', OWNER_FOLDER, filename)
+    assert match_filename_prefix(object_key, prefix) is matched
+
+
+@pytest.mark.parametrize('filename, prefix, matched', [
+    ('photo.png', 'ph', True),
+    ('photo.png', 'x', False),
+    # a filename starting with digits, not a ts
+    ('2024-photo.png', '2024', True),
+    ('2024-photo.png', '2024-ph', True),
+    ('99999-photo.png', '99999', True),
+])
+def test_match_filename_prefix_overwritable(filename, prefix, matched):
+    object_key = get_signed_overwritable_object_key('serial', OWNER_FOLDER, filename)
+    assert match_filename_prefix(object_key, prefix) is matched
+
+
+@pytest.mark.parametrize('token', [
+    'abc',
+    '1/abcDEF+ghi==',
+    'token with spaces & unicode: 日本',
+])
+def test_cursor_round_trip(token):
+    cursor = encode_cursor(token)
+    assert '+' not in cursor and '/' not in cursor
+    assert decode_cursor(cursor) == token
+
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    '!!!',
+    # bad padding
+    'YWJ',
+    # valid base64 of an empty token
+    base64.urlsafe_b64encode(b'').decode('ascii'),
+])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)